@@ -1,6 +1,8 @@
 import os
+import hashlib
+import functools
+import duckdb
 import pandas as pd
-from pandasql import sqldf
 import logging
 
 # Configure logging
@@ -10,26 +12,73 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# In-memory DuckDB connection shared by all queries
+con = duckdb.connect()
+
 def run_query(query):
     """
-    Execute SQL query on the 'companies' DataFrame in global namespace.
+    Execute SQL query on the 'companies' DataFrame registered with DuckDB.
+    
+    Args:
+        query (str): SQL query string to execute
+        
+    Returns:
+        pandas.DataFrame: Query results as a DataFrame
+    """
+    return con.execute(query).df()
+
+@functools.lru_cache(maxsize=None)
+def register_companies(csv_file):
+    """
+    Load the CSV file and register it with DuckDB as the 'companies' table.
+    
+    The file is only read once per run, and only if a query actually needs it.
+    
+    Args:
+        csv_file (str): Path to the CSV file
+    """
+    df = pd.read_csv(csv_file)
+    con.register('companies', df)
+
+def run_cached_query(query, csv_file, cache_dir):
+    """
+    Execute SQL query, reusing a cached result if neither the query nor the CSV changed.
+    
+    Results are cached as parquet files keyed by the CSV modification time and
+    the query text.
     
     Args:
         query (str): SQL query string to execute
+        csv_file (str): Path to the CSV file the query runs against
+        cache_dir (str): Directory holding cached query results
         
     Returns:
         pandas.DataFrame: Query results as a DataFrame
     """
-    pysqldf = lambda q: sqldf(q, globals())
-    return pysqldf(query)
+    key = hashlib.blake2b((str(os.path.getmtime(csv_file)) + query).encode()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"{key}.parquet")
+    
+    if os.path.exists(cache_path):
+        logging.info(f"Using cached result {cache_path}")
+        return pd.read_parquet(cache_path)
+    
+    register_companies(csv_file)
+    result = run_query(query)
+    
+    try:
+        result.to_parquet(cache_path, index=False)
+    except Exception as e:
+        logging.warning(f"Could not cache query result to {cache_path}: {e}")
+    
+    return result
 
 def main():
     """
     Main function to execute SQL queries on the cleaned dataset.
     
     This function:
-    1. Loads the cleaned CSV file into a pandas DataFrame
-    2. Executes each SQL query from separate files
+    1. Loads the cleaned CSV file into a pandas DataFrame when a query needs it
+    2. Executes each SQL query from separate files, reusing cached results
     3. Displays and saves the query results
     """
     # Define file paths based on your directory structure
@@ -40,19 +89,16 @@ def main():
     # Specify the exact input file in the data folder on the root
     csv_file = os.path.join(root_dir, "data", "assignment_output.csv")
     
-    # Create results folder if it doesn't exist
+    # Create results and cache folders if they don't exist
     results_dir = os.path.join(base_dir, "results")
-    os.makedirs(results_dir, exist_ok=True)
+    cache_dir = os.path.join(results_dir, ".cache")
+    os.makedirs(cache_dir, exist_ok=True)
     
     # Check if the CSV file exists
     if not os.path.exists(csv_file):
         logging.error(f"File {csv_file} not found. Please ensure it exists.")
         return
     
-    df = pd.read_csv(csv_file)
-    # Make DataFrame available globally for SQL queries to reference
-    globals()['companies'] = df
-    
     # Load SQL queries from files - must use the exact filenames from the original files
     query_files = [
         os.path.join(base_dir, "cities_count.sql"),
@@ -73,7 +119,7 @@ def main():
             with open(query_file, 'r') as f:
                 query = f.read()
                 
-            result = run_query(query)
+            result = run_cached_query(query, csv_file, cache_dir)
             
             logging.info(f"Results for '{query_name}':")
             if len(result) > 10:
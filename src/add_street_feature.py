@@ -1,10 +1,110 @@
+import asyncio
+import hashlib
+import json
+import os
+import math
+import time
+import numpy as np
 import pandas as pd
 import logging
-from openai import OpenAI
+import diskcache
+from dataclasses import dataclass, field
+from openai_client import get_async_client, retry_transient
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Maximum number of completion tokens requested per street address
+STREET_MAX_TOKENS = 50
+
+# Completion token budget per company in a batched prompt (JSON overhead included)
+BATCH_TOKENS_PER_ROW = 60
+
+# Company fields used by the street prompts and cache key
+STREET_FIELDS = ['company_name', 'country_code', 'region', 'state_code', 'city']
+
+@dataclass
+class RateLimiter:
+    """Proactive request and token rate limiter for the OpenAI API.
+    
+    Capacity is refilled continuously from the per-minute limits, and a request
+    is only dispatched once both the request and token budgets can cover it,
+    so rate limit errors are avoided rather than retried.
+    
+    Attributes:
+        rpm (float): Maximum requests per minute.
+        tpm (float): Maximum tokens per minute.
+        req_tokens (float): Currently available request capacity.
+        tok_tokens (float): Currently available token capacity.
+        last_update (float): Monotonic time of the last capacity refill.
+    """
+    rpm: float = 500
+    tpm: float = 200_000
+    req_tokens: float = None
+    tok_tokens: float = None
+    last_update: float = field(default_factory=time.monotonic)
+    
+    def __post_init__(self):
+        if self.req_tokens is None:
+            self.req_tokens = self.rpm
+        if self.tok_tokens is None:
+            self.tok_tokens = self.tpm
+    
+    def _refill(self):
+        """Refill the available capacity based on the time since the last update."""
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        self.req_tokens = min(self.rpm, self.req_tokens + self.rpm * elapsed / 60)
+        self.tok_tokens = min(self.tpm, self.tok_tokens + self.tpm * elapsed / 60)
+        self.last_update = now
+    
+    async def acquire(self, est_tokens):
+        """Wait until there is capacity for one request of the estimated size.
+        
+        Args:
+            est_tokens (int): Estimated number of tokens consumed by the request.
+        """
+        # A request larger than the whole budget would otherwise wait forever
+        est_tokens = min(est_tokens, self.tpm)
+        while True:
+            self._refill()
+            if self.req_tokens >= 1 and self.tok_tokens >= est_tokens:
+                self.req_tokens -= 1
+                self.tok_tokens -= est_tokens
+                return
+            await asyncio.sleep(0.05)
+    
+    def update_from_headers(self, headers):
+        """Tune the limits and remaining capacity from OpenAI rate limit headers.
+        
+        Args:
+            headers (Mapping): HTTP response headers from the OpenAI API.
+        """
+        try:
+            if 'x-ratelimit-limit-requests' in headers:
+                self.rpm = float(headers['x-ratelimit-limit-requests'])
+            if 'x-ratelimit-limit-tokens' in headers:
+                self.tpm = float(headers['x-ratelimit-limit-tokens'])
+            # Never assume more capacity than the server reports as remaining
+            if 'x-ratelimit-remaining-requests' in headers:
+                self.req_tokens = min(self.req_tokens, float(headers['x-ratelimit-remaining-requests']))
+            if 'x-ratelimit-remaining-tokens' in headers:
+                self.tok_tokens = min(self.tok_tokens, float(headers['x-ratelimit-remaining-tokens']))
+        except ValueError as e:
+            logger.warning(f"Could not parse rate limit headers: {e}")
+
+def estimate_tokens(prompt, max_tokens):
+    """Roughly estimate the tokens consumed by a request.
+    
+    Args:
+        prompt (str): Prompt sent to the API.
+        max_tokens (int): Maximum number of completion tokens.
+        
+    Returns:
+        int: Estimated prompt plus completion tokens.
+    """
+    return len(prompt) // 4 + max_tokens
+
 def load_dataset(filepath):
     """Load the dataset from a CSV file.
     
@@ -48,79 +148,270 @@ No explanation or additional text.
 """
     return prompt
 
-def call_openai_api(client, prompt, model="gpt-4o-mini"):
+def generate_batch_prompt(rows):
+    """
+    Generate a prompt to determine the street addresses of several companies at once.
+    
+    Args:
+        rows: List of dictionaries containing company information
+        
+    Returns:
+        String: Prompt for OpenAI API
+    """
+    companies = "\n".join(
+        f"{i}. Name: {row.get('company_name', 'Unknown')}; "
+        f"Country: {row.get('country_code', 'Unknown')}; "
+        f"Region: {row.get('region', 'Unknown')}; "
+        f"State: {row.get('state_code', 'Unknown')}; "
+        f"City: {row.get('city', 'Unknown')}"
+        for i, row in enumerate(rows, start=1)
+    )
+    
+    prompt = f"""
+You are tasked with determining the most likely street address for the headquarters of each of the following companies.
+Based on the information given, predict the street address where each company is located.
+
+Companies:
+{companies}
+
+Respond with ONLY a JSON array with one object per company, in the form:
+[{{"i": 1, "street": "18 Main Street"}}, {{"i": 2, "street": "2 Technology Drive"}}]
+Each street is the street name and number only. Do not include city, state, or country. Do not include apartment/suite numbers.
+No explanation or additional text.
+"""
+    return prompt
+
+def parse_batch_response(response):
+    """Parse the JSON array returned for a batched street prompt.
+    
+    Args:
+        response (str): Raw API response.
+        
+    Returns:
+        dict: Mapping of 1-based company number to street address. Empty if the
+        response could not be parsed.
+    """
+    if not response:
+        return {}
+    
+    # Strip markdown code fences the model sometimes adds around JSON
+    text = response.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("["):]
+    
+    try:
+        items = json.loads(text)
+        return {
+            int(item["i"]): str(item["street"]).strip()
+            for item in items
+            if isinstance(item, dict) and item.get("street")
+        }
+    except (ValueError, TypeError, KeyError) as e:
+        logger.warning(f"Could not parse batched street response: {e}")
+        return {}
+
+@retry_transient
+async def request_completion(client, prompt, model, limiter, max_tokens):
+    """Request a chat completion, retrying transient errors with backoff.
+    
+    Every attempt acquires its own capacity from the rate limiter.
+    
+    Args:
+        client (AsyncOpenAI): Async OpenAI client.
+        prompt (str): String prompt to send to API.
+        model (str): String model name to use.
+        limiter (RateLimiter): Optional rate limiter to acquire capacity from.
+        max_tokens (int): Maximum number of completion tokens.
+        
+    Returns:
+        str: API response.
+    """
+    if limiter is not None:
+        await limiter.acquire(estimate_tokens(prompt, max_tokens))
+    
+    raw_response = await client.chat.completions.with_raw_response.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": "You are a helpful business location research assistant."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.2,  
+        max_tokens=max_tokens
+    )
+    if limiter is not None:
+        limiter.update_from_headers(raw_response.headers)
+    
+    response = raw_response.parse()
+    return response.choices[0].message.content.strip()
+
+async def call_openai_api(client, prompt, model="gpt-4o-mini", limiter=None, max_tokens=STREET_MAX_TOKENS):
     """Call the OpenAI API with a prompt.
     
+    Rate limits, timeouts and server errors are retried before giving up.
+    
     Args:
-        client (OpenAI): OpenAI client.
+        client (AsyncOpenAI): Async OpenAI client.
         prompt (str): String prompt to send to API.
         model (str): String model name to use.
+        limiter (RateLimiter): Optional rate limiter to acquire capacity from.
+        max_tokens (int): Maximum number of completion tokens.
         
     Returns:
         str or None: API response if successful, None if fails.
     """
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a helpful business location research assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,  
-            max_tokens=50  # Keep 50 tokens for street addresses
-        )
-        return response.choices[0].message.content.strip()
+        return await request_completion(client, prompt, model, limiter, max_tokens)
     except Exception as e:
         logger.error(f"Error calling OpenAI API: {e}")
         return None
 
-def add_street_feature(df, client):
+async def _one(sem, client, row, limiter=None):
+    """Generate the street address for a single row, bounded by a semaphore.
+    
+    Args:
+        sem (asyncio.Semaphore): Semaphore limiting concurrent API requests.
+        client (AsyncOpenAI): Async OpenAI client.
+        row (dict): Dictionary containing company information.
+        limiter (RateLimiter): Optional rate limiter shared across requests.
+        
+    Returns:
+        str: Street address, or an empty string if the API call failed.
+    """
+    async with sem:
+        response = await call_openai_api(client, generate_prompt_for_street(row), limiter=limiter)
+    
+    # If API fails, use a placeholder value
+    return response if response else ""
+
+async def _batch(sem, client, rows, limiter=None):
+    """Generate the street addresses for a batch of rows with a single request.
+    
+    Companies missing from the batched response, or all of them if the response
+    is not valid JSON, fall back to single-row prompts. If the request itself
+    fails, no fallback is sent and every company gets an empty street, which
+    is not cached, so the next run requests it again.
+    
+    Args:
+        sem (asyncio.Semaphore): Semaphore limiting concurrent API requests.
+        client (AsyncOpenAI): Async OpenAI client.
+        rows (list): List of dictionaries containing company information.
+        limiter (RateLimiter): Optional rate limiter shared across requests.
+        
+    Returns:
+        list: Street addresses in the same order as rows.
+    """
+    async with sem:
+        response = await call_openai_api(
+            client,
+            generate_batch_prompt(rows),
+            limiter=limiter,
+            max_tokens=BATCH_TOKENS_PER_ROW * len(rows)
+        )
+    
+    # The API is already refusing or failing requests, so do not multiply them
+    if response is None:
+        return [""] * len(rows)
+    
+    streets = parse_batch_response(response)
+    
+    missing = [i for i in range(len(rows)) if not streets.get(i + 1)]
+    if missing:
+        logger.warning(f"Falling back to single-row prompts for {len(missing)} of {len(rows)} companies")
+        fallback = await asyncio.gather(*[_one(sem, client, rows[i], limiter) for i in missing])
+        for i, street in zip(missing, fallback):
+            streets[i + 1] = street
+    
+    return [streets[i + 1] for i in range(len(rows))]
+
+def street_cache_key(company_info):
+    """
+    Build the street cache key identifying a company.
+    
+    Args:
+        company_info: Dictionary containing company information
+        
+    Returns:
+        String: Hex digest of the company name, city and country
+    """
+    identity = f"{company_info.get('company_name')}|{company_info.get('city')}|{company_info.get('country_code')}"
+    return hashlib.blake2b(identity.lower().encode()).hexdigest()
+
+async def add_street_feature(df, client, max_concurrency=20, limiter=None, batch_size=20, cache=None):
     """
     Add street feature to the dataset using OpenAI.
     
+    The street column is added to df in place. Companies already in the cache
+    are not sent to the API. The rest are grouped into batches of batch_size,
+    each resolved with one request. Requests are dispatched concurrently, with
+    at most max_concurrency requests in flight at any time, and paced by a
+    shared rate limiter.
+    
     Args:
         df: DataFrame to process
-        client: OpenAI client
+        client: Async OpenAI client
+        max_concurrency: Maximum number of concurrent API requests
+        limiter: RateLimiter to pace requests, a default one is created if None
+        batch_size: Number of companies per request
+        cache: Optional diskcache.Cache of previously generated street addresses
         
     Returns:
         DataFrame: DataFrame with new street feature
     """
-    df_with_street = df.copy()
+    total_rows = len(df)
+    logger.info(f"Adding street feature to {total_rows} rows...")
     
-    # Add the new street column
-    df_with_street['street'] = None
+    if limiter is None:
+        limiter = RateLimiter()
     
-    # Process each row
-    total_rows = len(df_with_street)
-    logger.info(f"Adding street feature to {total_rows} rows...")
+    # Extract the prompt fields once instead of materializing a Series per row
+    rows = df[[column for column in STREET_FIELDS if column in df.columns]].to_dict('records')
+    streets = [""] * total_rows
     
-    for idx in df_with_street.index:
-        # Convert row to dictionary for prompt generation
-        row_dict = df_with_street.loc[idx].to_dict()
-        
-        # Generate prompt for street address
-        prompt = generate_prompt_for_street(row_dict)
-        
-        # Call OpenAI API
-        response = call_openai_api(client, prompt)
-        
-        # Process response
-        if response:
-            df_with_street.at[idx, 'street'] = response
-        else:
-            # If API fails, use a placeholder value
-            df_with_street.at[idx, 'street'] = ""
+    # Reuse street addresses resolved on previous runs
+    pending = list(range(total_rows))
+    if cache is not None:
+        keys = [street_cache_key(row) for row in rows]
+        pending = []
+        for i, key in enumerate(keys):
+            cached_street = cache.get(key)
+            if cached_street:
+                streets[i] = cached_street
+            else:
+                pending.append(i)
+        logger.info(f"Found {total_rows - len(pending)} cached street addresses")
+    
+    # Split the remaining rows into batches of at most batch_size companies
+    n_batches = max(1, math.ceil(len(pending) / batch_size))
+    batches = [batch for batch in np.array_split(np.array(pending, dtype=int), n_batches) if len(batch) > 0]
+    
+    sem = asyncio.Semaphore(max_concurrency)
+    tasks = [_batch(sem, client, [rows[i] for i in batch], limiter) for batch in batches]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Scatter batch results back; failed batches keep the empty placeholder
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error generating street addresses: {result}")
+            continue
+        for i, street in zip(batch, result):
+            streets[i] = street
+            if cache is not None and street:
+                cache[keys[i]] = street
+    df['street'] = streets
     
     logger.info("Street feature added successfully.")
-    return df_with_street
+    return df
 
-def add_street_column(input_file, output_file, api_key):
+def add_street_column(input_file, output_file, api_key, cache_dir=None):
     """Main function to add street feature to the dataset.
     
     Args:
         input_file (str): Path to input CSV file.
         output_file (str): Path to output CSV file.
         api_key (str): OpenAI API key.
+        cache_dir (str): Directory of the street address cache, defaults to
+            .street_cache next to the output file.
     
     Returns:
         pandas.DataFrame or None: DataFrame with new street feature, or None if operation failed.
@@ -131,11 +422,17 @@ def add_street_column(input_file, output_file, api_key):
         logger.error("Failed to load dataset.")
         return None
     
-    # Setup OpenAI client
-    client = OpenAI(api_key=api_key)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(output_file)), ".street_cache")
+    
+    async def run(cache):
+        # The shared async client is bound to the loop started by asyncio.run
+        client = get_async_client(api_key)
+        return await add_street_feature(df, client, cache=cache)
     
     # Add street feature
-    df_with_street = add_street_feature(df, client)
+    with diskcache.Cache(cache_dir) as cache:
+        df_with_street = asyncio.run(run(cache))
     
     # Save to output file
     try:
@@ -143,4 +440,6 @@ def add_street_column(input_file, output_file, api_key):
         logger.info(f"Dataset with added street feature saved to {output_file}")
     except Exception as e:
         logger.error(f"Error saving dataset: {e}")
-        return None
\ No newline at end of file
+        return None
+    
+    return df_with_street
\ No newline at end of file
@@ -2,15 +2,23 @@ import pandas as pd
 import numpy as np
 import os
 import logging
+import functools
+import contextlib
+import concurrent.futures
 from datetime import datetime
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Founding years after the current year are rejected
+CURRENT_YEAR = datetime.now().year
+
 
 def load_dataset(filepath):
     """Load the dataset from CSV file.
     
+    The file is parsed with the multi-threaded PyArrow CSV reader.
+    
     Args:
         filepath (str): Path to the CSV file
         
@@ -18,7 +26,7 @@ def load_dataset(filepath):
         DataFrame: Loaded pandas DataFrame or None if failed
     """
     try:
-        df = pd.read_csv(filepath)
+        df = pd.read_csv(filepath, engine='pyarrow')
         logger.info(f"Dataset loaded successfully with {df.shape[0]} rows and {df.shape[1]} columns")
         return df
     except Exception as e:
@@ -26,6 +34,19 @@ def load_dataset(filepath):
         return None
 
 
+def save_dataset(df, filepath):
+    """Save the dataset to a CSV file.
+    
+    The file is read by the later pipeline steps, so it is written with
+    pandas to keep their expected quoting and value formatting.
+    
+    Args:
+        df (DataFrame): DataFrame to save
+        filepath (str): Path to the CSV file
+    """
+    df.to_csv(filepath, index=False)
+
+
 def remove_empty_rows(df):
     """Remove completely empty rows.
     
@@ -35,68 +56,68 @@ def remove_empty_rows(df):
     Returns:
         DataFrame: DataFrame with empty rows removed
     """
-    empty_mask = df.isna().all(axis=1) | (df.astype(str).apply(lambda x: x.str.strip()).eq('').all(axis=1))
-    clean_df = df[~empty_mask].copy()
-    logger.info(f"Removed {sum(empty_mask)} completely empty rows")
-    return clean_df
+    # A cell is empty if it is missing or a whitespace-only string; only
+    # text columns can hold strings, so other columns (numbers, and dates
+    # parsed by the PyArrow reader) rely on isna alone
+    empty_cells = df.isna()
+    for column in df.columns:
+        if pd.api.types.infer_dtype(df[column], skipna=True) == 'string':
+            empty_cells[column] |= df[column].str.strip().eq('')
+    empty_mask = empty_cells.all(axis=1)
+    if empty_mask.any():
+        df = df.drop(index=df.index[empty_mask])
+    logger.info(f"Removed {empty_mask.sum()} completely empty rows")
+    return df
 
 
-def validate_company_name(df):
+def validate_company_name(series):
     """Validate and clean company names.
     
     Args:
-        df (DataFrame): Input DataFrame
+        series (Series): company_name column
         
     Returns:
-        DataFrame: DataFrame with validated company names
+        Series: Series with validated company names
     """
     # Clean up company names - strip whitespace
-    mask = ~df['company_name'].isna()
-    df.loc[mask, 'company_name'] = df.loc[mask, 'company_name'].apply(
-        lambda x: str(x).strip()
-    )
+    mask = series.notna()
+    names = series.copy()
+    names.loc[mask] = series.loc[mask].astype(str).str.strip()
     
-    return df
+    return names
 
 
-def validate_urls(df, url_column='homepage_url'):
+def validate_urls(series):
     """Validate and fix URLs.
     
     Args:
-        df (DataFrame): Input DataFrame
-        url_column (str): Name of the URL column
+        series (Series): URL column
         
     Returns:
-        DataFrame: DataFrame with fixed URLs
+        Series: Series with fixed URLs
     """
-    if url_column not in df.columns:
-        logger.warning(f"Column '{url_column}' not found in the dataset")
-        return df
-    
     # Fix URLs that exist
-    mask = ~df[url_column].isna()
+    mask = series.notna()
     
     # Add http:// if missing and fix common URL issues
-    df.loc[mask, url_column] = df.loc[mask, url_column].apply(
-        lambda x: f"http://{x.strip()}" if not x.startswith(('http://', 'https://')) else x.rstrip('/').strip()
-    )
+    urls = series.loc[mask].astype(str).str.strip().str.rstrip('/')
+    has_scheme = urls.str.startswith('http://') | urls.str.startswith('https://')
+    fixed = series.copy()
+    fixed.loc[mask] = np.where(has_scheme, urls, 'http://' + urls)
     
-    logger.info(f"Fixed URLs for {sum(mask)} rows")
-    return df
+    logger.info(f"Fixed URLs for {mask.sum()} rows")
+    return fixed
 
 
-def validate_status(df):
+def validate_status(series):
     """Validate and standardize company status values.
     
     Args:
-        df (DataFrame): Input DataFrame
+        series (Series): status column
         
     Returns:
-        DataFrame: DataFrame with standardized status values
+        Series: Series with standardized status values
     """
-    if 'status' not in df.columns:
-        return df
-        
     # Define mapping for status standardization
     status_map = {
         'operating': 'operating',
@@ -112,180 +133,242 @@ def validate_status(df):
     }
     
     # Standardize status values where they exist
-    mask = ~df['status'].isna()
+    mask = series.notna()
+    standardized_series = series.copy()
     if mask.any():
+        # Work on the few distinct statuses rather than on every row
+        categorical = series.loc[mask].astype('category')
+        
         # Convert to lowercase and strip whitespace
-        df.loc[mask, 'status'] = df.loc[mask, 'status'].str.lower().str.strip()
+        statuses = categorical.cat.categories.to_series().str.lower().str.strip()
         
-        # Apply the mapping
-        for idx in df[mask].index:
-            current_status = df.at[idx, 'status']
-            for key, value in status_map.items():
-                if key in current_status:
-                    df.at[idx, 'status'] = value
-                    break
-    
-    logger.info(f"Standardized status values for {sum(mask)} rows")
-    return df
+        # Apply the mapping - np.select picks the first matching key, so
+        # earlier entries in status_map take precedence
+        conditions = [statuses.str.contains(key, regex=False) for key in status_map]
+        standardized = np.select(conditions, list(status_map.values()), default=statuses.to_numpy())
+        standardized_series.loc[mask] = standardized[categorical.cat.codes.to_numpy()]
+    
+    logger.info(f"Standardized status values for {mask.sum()} rows")
+    return standardized_series
 
 
-def validate_date_column(df, date_column):
-    """Validate and standardize date format for a specific column.
+def parse_dates(values, date_format):
+    """Parse dates with a known format, inferring the format only where it fails.
     
     Args:
-        df (DataFrame): Input DataFrame
-        date_column (str): Name of the date column to validate
+        values (Series): Non-empty date values
+        date_format (str): Expected strptime format of the values
         
     Returns:
-        DataFrame: DataFrame with validated dates
+        Series: Parsed datetimes, NaT where a value could not be parsed
     """
-    if date_column not in df.columns:
-        return df
-    
-    # Count non-empty dates
-    mask = ~df[date_column].isna()
+    # An explicit format skips per-value inference; cache parses each
+    # distinct value once
+    parsed = pd.to_datetime(values, format=date_format, errors='coerce', cache=True)
     
-    try:
-        # Convert to datetime, keeping as datetime objects
-        df.loc[mask, date_column] = pd.to_datetime(df.loc[mask, date_column], errors='coerce')
-        logger.info(f"Standardized {sum(mask)} dates in {date_column}")
-    except Exception as e:
-        logger.warning(f"Error standardizing {date_column}: {e}")
+    # Fall back to format inference only for values in another layout
+    failed = parsed.isna()
+    if failed.any():
+        parsed.loc[failed] = pd.to_datetime(values.loc[failed], errors='coerce', cache=True)
     
-    return df
+    return parsed
 
 
-def validate_founded_month(df):
-    """Validate and standardize founded_month column.
+def validate_date_column(series, date_format='%Y-%m-%d'):
+    """Validate and standardize date format for a date column.
     
     Args:
-        df (DataFrame): Input DataFrame
+        series (Series): Date column to validate
+        date_format (str): Expected strptime format of the dates
         
     Returns:
-        DataFrame: DataFrame with validated founded_month
+        Series: Series with validated dates
     """
-    if 'founded_month' not in df.columns:
-        return df
-    
-    # Process non-empty values
-    mask = ~df['founded_month'].isna()
+    # Count non-empty dates
+    mask = series.notna()
     
     try:
-        # Convert to proper datetime objects
-        df.loc[mask, 'founded_month'] = pd.to_datetime(df.loc[mask, 'founded_month'], errors='coerce')
-        logger.info(f"Standardized {sum(mask)} founded_month values")
+        # Convert to datetime, keeping as datetime objects in an object
+        # column so that missing dates stay NaN
+        dates = series.astype(object)
+        dates.loc[mask] = parse_dates(series.loc[mask], date_format)
+        logger.info(f"Standardized {mask.sum()} dates in {series.name}")
+        return dates
     except Exception as e:
-        logger.warning(f"Error standardizing founded_month: {e}")
-    
-    return df
+        logger.warning(f"Error standardizing {series.name}: {e}")
+        return series
 
 
-def validate_founded_quarter(df):
-    """Validate founded_quarter column.
+def validate_founded_year(series):
+    """Validate founded_year column.
     
     Args:
-        df (DataFrame): Input DataFrame
+        series (Series): founded_year column
         
     Returns:
-        DataFrame: DataFrame with validated founded_quarter
+        Series: Series with validated founded_year
     """
-    if 'founded_quarter' not in df.columns:
-        return df
+    # Check for invalid years - only reject future years
+    # Convert to numeric once and reject future years on the underlying array
+    years = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, copy=True)
+    future_mask = years > CURRENT_YEAR
     
-    # Check non-empty values
-    mask = ~df['founded_quarter'].isna()
-    logger.info(f"Checked {sum(mask)} founded_quarter values")
+    future_count = int(future_mask.sum())
+    if future_count > 0:
+        years[future_mask] = np.nan
+        logger.info(f"Removed {future_count} future years from {series.name}")
     
-    return df
+    return pd.Series(years, index=series.index, name=series.name)
 
 
-def validate_founded_year(df):
-    """Validate founded_year column.
+def validate_code(series):
+    """Validate country or state codes.
     
     Args:
-        df (DataFrame): Input DataFrame
+        series (Series): country_code or state_code column
         
     Returns:
-        DataFrame: DataFrame with validated founded_year
+        Series: Series with validated codes
     """
-    if 'founded_year' not in df.columns:
-        return df
-    
-    # Check for invalid years - only reject future years
-    current_year = datetime.now().year
-    mask = ~df['founded_year'].isna()
+    # Ensure codes are uppercase, converting each distinct code only once
+    mask = series.notna()
+    if not mask.any():
+        return series
+    
+    categorical = series.loc[mask].astype('category')
+    upper_codes = categorical.cat.categories.str.upper().to_numpy()
+    codes = series.copy()
+    codes.loc[mask] = upper_codes[categorical.cat.codes.to_numpy()]
+    logger.info(f"Standardized {mask.sum()} {series.name} values")
+    
+    return codes
+
+
+def validate_numeric_column(series):
+    """Validate numeric columns like funding_rounds and funding_total_usd.
     
-    # Convert to numeric and only reject future years
-    df.loc[mask, 'founded_year'] = pd.to_numeric(df.loc[mask, 'founded_year'], errors='coerce')
-    future_mask = df['founded_year'] > current_year
+    Args:
+        series (Series): Numeric column to validate
+        
+    Returns:
+        Series: Series with validated numeric values
+    """
+    # Convert to numeric, coerce errors to NaN - missing values stay NaN
+    numeric = pd.to_numeric(series, errors='coerce')
     
-    if sum(future_mask) > 0:
-        df.loc[future_mask, 'founded_year'] = np.nan
-        logger.info(f"Removed {sum(future_mask)} future years from founded_year")
+    # Check for negative values (invalid for these columns)
+    negative_mask = (numeric < 0)
+    negative_count = int(negative_mask.sum())
+    if negative_count > 0:
+        logger.warning(f"Found {negative_count} negative values in {series.name} (converting to NaN)")
     
-    return df
+    return numeric.mask(negative_mask)
+
 
+# Validation applied to each column, in order
+COLUMN_TRANSFORMS = (
+    ('company_name', validate_company_name),
+    ('homepage_url', validate_urls),
+    ('status', validate_status),
+    ('company_founding_date', validate_date_column),
+    ('first_funding_round_at', validate_date_column),
+    ('last_funding_round_at', validate_date_column),
+    ('founded_year', validate_founded_year),
+    ('founded_month', functools.partial(validate_date_column, date_format='%Y-%m')),
+    ('country_code', validate_code),
+    ('state_code', validate_code),
+    ('funding_rounds', validate_numeric_column),
+    ('funding_total_usd', validate_numeric_column)
+)
 
-def validate_country_state_codes(df):
-    """Validate country and state codes.
+
+@functools.lru_cache(maxsize=None)
+def column_plan(columns):
+    """Select the column transforms that apply to a dataset.
+    
+    Cached on the column names, so every chunk of a file reuses the same plan
+    and missing columns are only reported once.
     
     Args:
-        df (DataFrame): Input DataFrame
+        columns (tuple): Column names of the dataset
         
     Returns:
-        DataFrame: DataFrame with validated codes
+        tuple: (column, transform) pairs for the columns present
     """
-    # Ensure country codes are uppercase
-    if 'country_code' in df.columns:
-        mask = ~df['country_code'].isna()
-        df.loc[mask, 'country_code'] = df.loc[mask, 'country_code'].str.upper()
-        logger.info(f"Standardized {sum(mask)} country_code values")
-    
-    # Ensure state codes are uppercase
-    if 'state_code' in df.columns:
-        mask = ~df['state_code'].isna()
-        df.loc[mask, 'state_code'] = df.loc[mask, 'state_code'].str.upper()
-        logger.info(f"Standardized {sum(mask)} state_code values")
+    plan = []
+    for column, transform in COLUMN_TRANSFORMS:
+        if column not in columns:
+            logger.warning(f"Column '{column}' not found in the dataset")
+            continue
+        plan.append((column, transform))
     
-    return df
+    return tuple(plan)
 
 
-def validate_numeric_columns(df):
-    """Validate numeric columns like funding_rounds and funding_total_usd.
+def apply_transform(task):
+    """Apply a column transform, as a unit of work for a worker process.
     
     Args:
-        df (DataFrame): Input DataFrame
+        task (tuple): Column Series and the transform to apply to it
         
     Returns:
-        DataFrame: DataFrame with validated numeric columns
+        Series: Transformed column
     """
-    numeric_columns = ['funding_rounds', 'funding_total_usd']
+    series, transform = task
+    return transform(series)
+
+
+def worker_pool(workers):
+    """Create the process pool used to validate columns in parallel.
     
-    for column in numeric_columns:
-        if column not in df.columns:
-            continue
-        
-        # Ensure values are numeric and valid
-        mask = ~df[column].isna()
+    Args:
+        workers (int): Number of worker processes
         
-        # Convert to numeric, coerce errors to NaN
-        df.loc[mask, column] = pd.to_numeric(df.loc[mask, column], errors='coerce')
+    Returns:
+        Context manager yielding a ProcessPoolExecutor, or None if workers is None or 1
+    """
+    if workers and workers > 1:
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    return contextlib.nullcontext()
+
+
+def clean_frame(df, executor=None):
+    """Remove empty rows and validate every column of a DataFrame.
+    
+    Args:
+        df (DataFrame): DataFrame to clean, modified in place where possible
+        executor (Executor): Pool to validate columns in parallel,
+            columns are validated sequentially if None
         
-        # Check for negative values (invalid for these columns)
-        negative_mask = (df[column] < 0)
-        if sum(negative_mask) > 0:
-            logger.warning(f"Found {sum(negative_mask)} negative values in {column} (converting to NaN)")
-            df.loc[negative_mask, column] = np.nan
+    Returns:
+        DataFrame: Cleaned DataFrame
+    """
+    # Step 1: Remove completely empty rows
+    df = remove_empty_rows(df)
+    
+    # Step 2: Validate each column in a single pass - every transform
+    # works on one column of the frame, so no step copies the whole frame
+    tasks = column_plan(tuple(df.columns))
+    
+    # Columns are independent, so they can be validated in separate processes
+    if executor is not None:
+        results = executor.map(apply_transform, [(df[column], transform) for column, transform in tasks])
+        for (column, _), result in zip(tasks, results):
+            df[column] = result
+    else:
+        for column, transform in tasks:
+            df[column] = transform(df[column])
     
     return df
 
 
-def clean_dataset(input_file, output_file):
+def clean_dataset(input_file, output_file, workers=None):
     """Main function to clean the dataset.
     
     Args:
         input_file (str): Path to input CSV file
         output_file (str): Path to output CSV file
+        workers (int): Number of processes to validate columns in parallel
         
     Returns:
         DataFrame: Cleaned DataFrame or None if operation failed
@@ -299,33 +382,8 @@ def clean_dataset(input_file, output_file):
     # Initial dataset stats
     logger.info(f"Initial dataset: {df.shape[0]} rows, {df.shape[1]} columns")
     
-    # Step 1: Remove completely empty rows
-    df = remove_empty_rows(df)
-    
-    # Step 2: Validate company names
-    df = validate_company_name(df)
-    
-    # Step 3: Validate and fix URLs
-    df = validate_urls(df, url_column='homepage_url')
-    
-    # Step 4: Validate status values
-    df = validate_status(df)
-    
-    # Step 5: Validate date columns
-    date_columns = ['company_founding_date', 'first_funding_round_at', 'last_funding_round_at']
-    for column in date_columns:
-        df = validate_date_column(df, column)
-    
-    # Step 6: Validate founded year, month, quarter
-    df = validate_founded_year(df)
-    df = validate_founded_month(df)
-    df = validate_founded_quarter(df)
-    
-    # Step 7: Validate country and state codes
-    df = validate_country_state_codes(df)
-    
-    # Step 8: Validate numeric columns
-    df = validate_numeric_columns(df)
+    with worker_pool(workers) as executor:
+        df = clean_frame(df, executor=executor)
     
     # Final dataset stats
     logger.info(f"Final cleaned dataset: {df.shape[0]} rows, {df.shape[1]} columns")
@@ -334,10 +392,50 @@ def clean_dataset(input_file, output_file):
     try:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(os.path.realpath(output_file)), exist_ok=True)
-        df.to_csv(output_file, index=False)
+        save_dataset(df, output_file)
         logger.info(f"Cleaned dataset saved to {output_file}")
     except Exception as e:
         logger.error(f"Error saving cleaned dataset: {e}")
         return None
     
-    return df
\ No newline at end of file
+    return df
+
+
+def clean_dataset_in_chunks(input_file, output_file, chunksize=200_000, workers=None):
+    """Clean a dataset too large for memory, one chunk of rows at a time.
+    
+    Each chunk is cleaned and appended to the output CSV before the next one
+    is read, so memory use is bounded by the chunk size rather than the file size.
+    
+    Args:
+        input_file (str): Path to input CSV file
+        output_file (str): Path to output CSV file
+        chunksize (int): Number of rows per chunk
+        workers (int): Number of processes to validate columns in parallel
+        
+    Returns:
+        int: Number of rows written, or None if operation failed
+    """
+    rows_written = 0
+    
+    try:
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(os.path.realpath(output_file)), exist_ok=True)
+        
+        # The PyArrow engine cannot stream, so chunks are read with the C engine.
+        # The worker processes are started once and reused for every chunk
+        with open(output_file, 'w', newline='') as sink, worker_pool(workers) as executor:
+            for i, chunk in enumerate(pd.read_csv(input_file, chunksize=chunksize, engine='c')):
+                chunk = clean_frame(chunk, executor=executor)
+                
+                # Only the first chunk writes the header row
+                chunk.to_csv(sink, index=False, header=(i == 0))
+                
+                rows_written += len(chunk)
+                logger.info(f"Cleaned chunk {i + 1} ({rows_written} rows written so far)")
+    except Exception as e:
+        logger.error(f"Error cleaning dataset in chunks: {e}")
+        return None
+    
+    logger.info(f"Cleaned dataset saved to {output_file}")
+    return rows_written
\ No newline at end of file
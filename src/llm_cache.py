@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+import inspect
+import functools
+import logging
+import diskcache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Cache location and lifetime of cached responses
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".llm_cache")
+CACHE_TTL = 7 * 24 * 60 * 60  # 7 days, in seconds
+
+# Hit and miss counters for the current run
+stats = {'hits': 0, 'misses': 0}
+
+_cache = None
+
+
+def get_cache():
+    """Open the on-disk response cache on first use.
+
+    Returns:
+        diskcache.Cache: Shared response cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = diskcache.Cache(CACHE_DIR)
+    return _cache
+
+
+def hash_key(prompt, model, temperature):
+    """Build a content-addressed cache key for an LLM request.
+
+    Args:
+        prompt (str): Prompt sent to the model.
+        model (str): Model name.
+        temperature (float): Sampling temperature, None if the request has none.
+
+    Returns:
+        str: SHA-256 hex digest identifying the request.
+    """
+    payload = json.dumps({"prompt": prompt, "model": model, "temp": temperature}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cached(key_fn, ttl=CACHE_TTL):
+    """Cache the results of a sync or async LLM call on disk.
+
+    Failed calls, which return None, are not cached.
+
+    Args:
+        key_fn (callable): Builds the cache key from the wrapped function's arguments.
+        ttl (int): Seconds before a cached response expires.
+
+    Returns:
+        callable: Decorator applying the cache.
+    """
+    def lookup(key):
+        value = get_cache().get(key)
+        stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+    def store(key, value):
+        if value is not None:
+            get_cache().set(key, value, expire=ttl)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = key_fn(*args, **kwargs)
+                value = lookup(key)
+                if value is None:
+                    value = await func(*args, **kwargs)
+                    store(key, value)
+                return value
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = key_fn(*args, **kwargs)
+            value = lookup(key)
+            if value is None:
+                value = func(*args, **kwargs)
+                store(key, value)
+            return value
+        return wrapper
+
+    return decorator
+
+
+def log_cache_stats():
+    """Log the cache hits and misses of the current run."""
+    logger.info(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses")
\ No newline at end of file
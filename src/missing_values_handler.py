@@ -1,13 +1,62 @@
+import os
+import json
+import time
+import tempfile
+import asyncio
+import itertools
 import pandas as pd
 import logging
-from openai import OpenAI
+from openai_client import get_client, get_async_client, retry_transient
+from llm_cache import cached, hash_key, log_cache_stats
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Shared chat settings for the online and Batch API paths
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0  # Deterministic answers
+MAX_TOKENS = 50  # Adequate for city names, status, etc. wrapped in JSON
+
+# Instructions shared by every prompt, sent first so the common prefix can be
+# reused by OpenAI's prompt caching
+SYSTEM_PROMPT = (
+    "You are a helpful business research assistant. "
+    "You are tasked with predicting missing details of companies, such as their operational status, "
+    "homepage URL or headquarters city, from the company information provided. "
+    "Respond only with the requested JSON object, no explanation or additional text."
+)
+
+# Allowed values of the status column
+VALID_STATUSES = ['operating', 'closed', 'acquired', 'public']
+
+# JSON schema of a generated value, per column
+VALUE_SCHEMAS = {
+    'status': {"type": "string", "enum": VALID_STATUSES},
+    'homepage_url': {"type": "string"},
+    'city': {"type": "string"}
+}
+
+# Rows per batched prompt, and completion tokens budgeted per row (JSON included)
+BATCH_SIZE = 50
+BATCH_TOKENS_PER_ROW = 40
+
+# Batch API statuses after which a batch will make no further progress
+BATCH_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+# Seconds between checkpoints of the dataset while filling
+CHECKPOINT_INTERVAL = 60
+
+# Low-cardinality columns held as categoricals while filling
+CATEGORY_COLUMNS = ['status', 'country_code', 'market', 'city']
+
 def load_dataset(filepath):
     """Load the dataset from a CSV file.
     
+    The low-cardinality columns in CATEGORY_COLUMNS are stored as
+    categoricals. The C parser is used rather than PyArrow, which would
+    turn the date columns into timestamps and change how they are written
+    back and shown in the prompts.
+    
     Args:
         filepath (str): Path to the CSV file.
         
@@ -16,192 +65,698 @@ def load_dataset(filepath):
     """
     try:
         df = pd.read_csv(filepath)
+        for col in CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
         return df
     except Exception as e:
         logger.error(f"Error loading dataset: {e}")
         return None
 
+def assign_values(df, column, indices, values):
+    """Write values into a column, registering unseen values as categories.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame to update in place.
+        column (str): Column to write to.
+        indices (list): Row indices to write.
+        values (list): Values to write, one per index.
+    """
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        new_categories = pd.Index(values).unique().difference(df[column].cat.categories)
+        if len(new_categories):
+            df[column] = df[column].cat.add_categories(new_categories)
+    df.loc[indices, column] = values
+
+def save_dataset(df, filepath):
+    """Save the dataset to a CSV file atomically.
+    
+    The data is written to a temporary file first and then moved into place,
+    so an interrupted write never leaves a truncated file behind.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame to save.
+        filepath (str): Path to the CSV file.
+    """
+    tmp_path = f"{filepath}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, filepath)
+
+# Company fields included in the prompts for each column
+STATUS_FIELDS = ('company_name', 'market', 'country_code', 'region', 'founded_year', 'homepage_url',
+                 'funding_total_usd', 'funding_rounds', 'last_funding_round_at')
+HOMEPAGE_URL_FIELDS = ('company_name', 'market', 'country_code', 'permalink')
+CITY_FIELDS = ('company_name', 'market', 'country_code', 'region', 'state_code')
+
+# Single-row prompt templates, filled with str.format_map
+STATUS_PROMPT_TEMPLATE = """
+You are tasked with determining the current operational status of a company.
+Based on the following information, predict the most likely status of the company.
+
+Company Information:
+- Name: {company_name}
+- Market: {market}
+- Country: {country_code}
+- Region: {region}
+- Founded Year: {founded_year}
+- Homepage URL: {homepage_url}
+- Funding Info: Total USD ${funding_total_usd}, Rounds: {funding_rounds}
+- Last Funding: {last_funding_round_at}
+
+Respond with a JSON object of the form {{"status": "operating"}}.
+The status must be one of: 'operating', 'closed', 'acquired', or 'public'.
+"""
+
+HOMEPAGE_URL_PROMPT_TEMPLATE = """
+You are tasked with finding the most likely homepage URL for a company.
+Based on the following information, predict the most likely homepage URL.
+
+Company Information:
+- Name: {company_name}
+- Market: {market}
+- Country: {country_code}
+- Permalink: {permalink}
+
+Respond with a JSON object of the form {{"homepage_url": "https://www.companyname.com"}}.
+The homepage_url must be a complete URL starting with http:// or https://.
+"""
+
+CITY_PROMPT_TEMPLATE = """
+You are tasked with determining the most likely headquarters city for a company.
+Based on the following information, predict the city where the company's headquarters is located.
+
+Company Information:
+- Name: {company_name}
+- Market: {market}
+- Country: {country_code}
+- Region: {region}
+- State: {state_code}
+
+Respond with a JSON object of the form {{"city": "San Francisco"}}.
+The city is the city name only, for example 'San Francisco' or 'London'.
+"""
+
+def format_prompt(template, fields, company_info):
+    """Fill a prompt template with company information.
+    
+    Args:
+        template (str): Prompt template with one placeholder per field.
+        fields (tuple): Fields referenced by the template.
+        company_info (dict): Dictionary containing company information.
+        
+    Returns:
+        str: Prompt for OpenAI API.
+    """
+    return template.format_map({field: company_info.get(field, 'Unknown') for field in fields})
+
 def generate_prompt_for_status(company_info):
     """Generate a prompt to determine a company's status.
     
     Args:
         company_info (dict): Dictionary containing company information.
         
+    Returns:
+        str: Prompt for OpenAI API.
+    """
+    return format_prompt(STATUS_PROMPT_TEMPLATE, STATUS_FIELDS, company_info)
+
+def generate_prompt_for_homepage_url(company_info):
+    """Generate a prompt to determine a company's homepage URL.
+    
+    Args:
+        company_info (dict): Dictionary containing company information.
+        
+    Returns:
+        str: Prompt for OpenAI API.
+    """
+    return format_prompt(HOMEPAGE_URL_PROMPT_TEMPLATE, HOMEPAGE_URL_FIELDS, company_info)
+
+def generate_prompt_for_city(company_info):
+    """Generate a prompt to determine a company's headquarters city.
+    
+    Args:
+        company_info (dict): Dictionary containing company information.
+        
+    Returns:
+        str: Prompt for OpenAI API.
+    """
+    return format_prompt(CITY_PROMPT_TEMPLATE, CITY_FIELDS, company_info)
+
+def format_batch_rows(rows, fields):
+    """Serialize the relevant fields of several companies as a JSON array.
+    
+    Args:
+        rows (list): List of dicts containing company information.
+        fields (tuple): Fields to include for each company.
+        
+    Returns:
+        str: JSON array with one object per company, identified by its position.
+    """
+    companies = [
+        {"id": i, **{field: row.get(field) if pd.notna(row.get(field)) else 'Unknown' for field in fields}}
+        for i, row in enumerate(rows)
+    ]
+    return json.dumps(companies, default=str)
+
+def generate_batch_prompt_for_status(rows):
+    """Generate a prompt to determine the status of several companies.
+    
+    Args:
+        rows (list): List of dicts containing company information.
+        
     Returns:
         str: Prompt for OpenAI API.
     """
     prompt = f"""
-You are tasked with determining the current operational status of a company.
-Based on the following information, predict the most likely status of the company.
+You are tasked with determining the current operational status of several companies.
+Based on the following information, predict the most likely status of each company.
 
-Company Information:
-- Name: {company_info.get('company_name', 'Unknown')}
-- Market: {company_info.get('market', 'Unknown')}
-- Country: {company_info.get('country_code', 'Unknown')}
-- Region: {company_info.get('region', 'Unknown')}
-- Founded Year: {company_info.get('founded_year', 'Unknown')}
-- Homepage URL: {company_info.get('homepage_url', 'Unknown')}
-- Funding Info: Total USD ${company_info.get('funding_total_usd', 'Unknown')}, Rounds: {company_info.get('funding_rounds', 'Unknown')}
-- Last Funding: {company_info.get('last_funding_round_at', 'Unknown')}
-
-Respond with ONLY one of these options: 'operating', 'closed', 'acquired', or 'public'.
-No explanation or additional text.
+Companies (JSON):
+{format_batch_rows(rows, STATUS_FIELDS)}
+
+Return a JSON object of the form {{"results": [{{"id": 0, "status": "operating"}}, ...]}} with one entry per company.
+Each status must be one of: 'operating', 'closed', 'acquired', or 'public'.
 """
     return prompt
 
-def generate_prompt_for_homepage_url(company_info):
-    """Generate a prompt to determine a company's homepage URL.
+def generate_batch_prompt_for_homepage_url(rows):
+    """Generate a prompt to determine the homepage URL of several companies.
     
     Args:
-        company_info (dict): Dictionary containing company information.
+        rows (list): List of dicts containing company information.
         
     Returns:
         str: Prompt for OpenAI API.
     """
     prompt = f"""
-You are tasked with finding the most likely homepage URL for a company.
-Based on the following information, predict the most likely homepage URL.
+You are tasked with finding the most likely homepage URL for several companies.
+Based on the following information, predict the most likely homepage URL of each company.
 
-Company Information:
-- Name: {company_info.get('company_name', 'Unknown')}
-- Market: {company_info.get('market', 'Unknown')}
-- Country: {company_info.get('country_code', 'Unknown')}
-- Permalink: {company_info.get('permalink', 'Unknown')}
-
-Respond with ONLY a complete URL (starting with http:// or https://). 
-For example: https://www.companyname.com
-No explanation or additional text.
+Companies (JSON):
+{format_batch_rows(rows, HOMEPAGE_URL_FIELDS)}
+
+Return a JSON object of the form {{"results": [{{"id": 0, "homepage_url": "https://www.companyname.com"}}, ...]}} with one entry per company.
+Each homepage_url must be a complete URL starting with http:// or https://.
 """
     return prompt
 
-def generate_prompt_for_city(company_info):
-    """Generate a prompt to determine a company's headquarters city.
+def generate_batch_prompt_for_city(rows):
+    """Generate a prompt to determine the headquarters city of several companies.
     
     Args:
-        company_info (dict): Dictionary containing company information.
+        rows (list): List of dicts containing company information.
         
     Returns:
         str: Prompt for OpenAI API.
     """
     prompt = f"""
-You are tasked with determining the most likely headquarters city for a company.
-Based on the following information, predict the city where the company's headquarters is located.
+You are tasked with determining the most likely headquarters city for several companies.
+Based on the following information, predict the city where each company's headquarters is located.
 
-Company Information:
-- Name: {company_info.get('company_name', 'Unknown')}
-- Market: {company_info.get('market', 'Unknown')}
-- Country: {company_info.get('country_code', 'Unknown')}
-- Region: {company_info.get('region', 'Unknown')}
-- State: {company_info.get('state_code', 'Unknown')}
-
-Respond with ONLY the city name. For example: 'San Francisco' or 'London'.
-No explanation or additional text.
+Companies (JSON):
+{format_batch_rows(rows, CITY_FIELDS)}
+
+Return a JSON object of the form {{"results": [{{"id": 0, "city": "San Francisco"}}, ...]}} with one entry per company.
+Each city is the city name only, for example 'San Francisco' or 'London'.
 """
     return prompt
 
-def call_openai_api(client, prompt, model="gpt-4o-mini"):
+def parse_batch_response(response, column):
+    """Parse the JSON object returned for a batched prompt.
+    
+    Args:
+        response (str): Raw API response.
+        column (str): Column the values were generated for.
+        
+    Returns:
+        dict: Mapping of row position to generated value. Empty if the response
+        could not be parsed.
+    """
+    if not response:
+        return {}
+    
+    try:
+        results = json.loads(response)["results"]
+        return {
+            int(item["id"]): str(item[column]).strip()
+            for item in results
+            if isinstance(item, dict) and item.get(column)
+        }
+    except (ValueError, TypeError, KeyError) as e:
+        logger.warning(f"Could not parse batched {column} response: {e}")
+        return {}
+
+def parse_single_response(response, column):
+    """Parse the JSON object returned for a single-row prompt.
+    
+    Args:
+        response (str): Raw API response.
+        column (str): Column the value was generated for.
+        
+    Returns:
+        str or None: Generated value, None if the response could not be parsed.
+    """
+    if not response:
+        return None
+    
+    try:
+        value = str(json.loads(response)[column]).strip()
+        return value or None
+    except (ValueError, TypeError, KeyError) as e:
+        logger.warning(f"Could not parse {column} response: {e}")
+        return None
+
+def build_response_format(column, batched=False):
+    """Build the structured output format that responses for a column must follow.
+    
+    Args:
+        column (str): Column the values are generated for.
+        batched (bool): Build the format of a batched prompt's response,
+            a list of values identified by id, instead of a single value.
+        
+    Returns:
+        dict: Strict json_schema response format.
+    """
+    if batched:
+        item = {
+            "type": "object",
+            "properties": {"id": {"type": "integer"}, column: VALUE_SCHEMAS[column]},
+            "required": ["id", column],
+            "additionalProperties": False
+        }
+        schema = {
+            "type": "object",
+            "properties": {"results": {"type": "array", "items": item}},
+            "required": ["results"],
+            "additionalProperties": False
+        }
+    else:
+        schema = {
+            "type": "object",
+            "properties": {column: VALUE_SCHEMAS[column]},
+            "required": [column],
+            "additionalProperties": False
+        }
+    
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": f"{column}_results" if batched else column, "strict": True, "schema": schema}
+    }
+
+def openai_cache_key(client, prompt, model=MODEL, max_tokens=MAX_TOKENS, response_format=None):
+    """Build the response cache key for a call_openai_api call.
+    
+    Args:
+        client (AsyncOpenAI): Async OpenAI client, not part of the key.
+        prompt (str): String prompt to send to API.
+        model (str): String model name to use.
+        max_tokens (int): Not part of the key.
+        response_format (dict): Not part of the key.
+        
+    Returns:
+        str: Cache key.
+    """
+    return hash_key(prompt, model, temperature=TEMPERATURE)
+
+@retry_transient
+async def request_completion(client, prompt, model, max_tokens, response_format):
+    """Request a chat completion, retrying transient errors with backoff.
+    
+    Args:
+        client (AsyncOpenAI): Async OpenAI client.
+        prompt (str): String prompt to send to API.
+        model (str): String model name to use.
+        max_tokens (int): Maximum number of completion tokens.
+        response_format (dict): Optional response format, e.g. a JSON schema.
+        
+    Returns:
+        str: API response.
+    """
+    options = {"response_format": response_format} if response_format else {}
+    response = await client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=TEMPERATURE,
+        max_tokens=max_tokens,
+        **options
+    )
+    return response.choices[0].message.content.strip()
+
+@cached(key_fn=openai_cache_key)
+async def call_openai_api(client, prompt, model=MODEL, max_tokens=MAX_TOKENS, response_format=None):
     """Call the OpenAI API with a prompt.
     
+    Rate limits, timeouts and server errors are retried first. A failed call
+    returns None, so the value stays missing and is requested again on the
+    next run.
+    
     Args:
-        client (OpenAI): OpenAI client.
+        client (AsyncOpenAI): Async OpenAI client.
         prompt (str): String prompt to send to API.
         model (str): String model name to use.
+        max_tokens (int): Maximum number of completion tokens.
+        response_format (dict): Optional response format, e.g. a JSON schema.
         
     Returns:
         str or None: API response if successful, None if fails.
     """
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "You are a helpful business research assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,  
-            max_tokens=30  # Adequate for city names, status, etc.
-        )
-        return response.choices[0].message.content.strip()
+        return await request_completion(client, prompt, model, max_tokens, response_format)
     except Exception as e:
         logger.error(f"Error calling OpenAI API: {e}")
         return None
     
 
-def fill_missing_values(df, client):
+# Prompt generator for each column that can be filled
+PROMPT_GENERATORS = {
+    'status': generate_prompt_for_status,
+    'homepage_url': generate_prompt_for_homepage_url,
+    'city': generate_prompt_for_city
+}
+
+# Batched prompt generator for each column that can be filled
+BATCH_PROMPT_GENERATORS = {
+    'status': generate_batch_prompt_for_status,
+    'homepage_url': generate_batch_prompt_for_homepage_url,
+    'city': generate_batch_prompt_for_city
+}
+
+def clean_response(column, response):
+    """Validate an API response and convert it to the value stored in a column.
+    
+    Args:
+        column (str): Column the response was generated for.
+        response (str): Raw API response.
+        
+    Returns:
+        str or None: Value to store in the column, None if the response is not
+        a valid value.
+    """
+    # Simple validation
+    if column == 'status':
+        response = response.lower()
+        return response if response in VALID_STATUSES else None
+    
+    if column == 'homepage_url':
+        if response.startswith(('http://', 'https://')):
+            return response
+        return 'https://' + response.lstrip('www.')
+    
+    return response
+
+async def fill_column(df, client, column):
+    """Fill the missing values of one column.
+    
+    Values are filled in df in place, one batched prompt per chunk of
+    BATCH_SIZE missing rows. Rows the batched response leaves out are retried
+    with single-row prompts, unless the batched request failed outright.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame with missing values.
+        client (AsyncOpenAI): Async OpenAI client.
+        column (str): Column to fill.
+    """
+    missing_indices = df.index[df[column].isna()]
+    
+    if len(missing_indices) == 0:
+        logger.info(f"No missing values in column '{column}'")
+        return
+    
+    logger.info(f"Processing {len(missing_indices)} missing {column} values...")
+    
+    # Convert the missing rows to dictionaries for prompt generation at once
+    remaining = zip(missing_indices, df.loc[missing_indices].to_dict('records'))
+    
+    # Filled value count and a few examples, logged once the column is done
+    filled_count = 0
+    examples = []
+    debug = logger.isEnabledFor(logging.DEBUG)
+    
+    # Send the missing rows in chunks, one batched prompt per chunk
+    while True:
+        chunk = list(itertools.islice(remaining, BATCH_SIZE))
+        if not chunk:
+            break
+        chunk_idx = [idx for idx, _ in chunk]
+        rows = [row_dict for _, row_dict in chunk]
+        
+        # Call OpenAI API (without excessive logging)
+        response = await call_openai_api(
+            client,
+            BATCH_PROMPT_GENERATORS[column](rows),
+            max_tokens=BATCH_TOKENS_PER_ROW * len(rows),
+            response_format=build_response_format(column, batched=True)
+        )
+        values = parse_batch_response(response, column)
+        
+        # Fall back to concurrent single-row prompts for rows missing from
+        # the batched response. If the request itself failed, the API is
+        # already refusing or failing requests, so the rows are left missing
+        # rather than multiplying them
+        if response is None:
+            unanswered = []
+        else:
+            unanswered = [i for i in range(len(rows)) if not values.get(i)]
+        fallbacks = await asyncio.gather(
+            *[
+                call_openai_api(client, PROMPT_GENERATORS[column](rows[i]), response_format=build_response_format(column))
+                for i in unanswered
+            ]
+        )
+        values.update((i, parse_single_response(response, column)) for i, response in zip(unanswered, fallbacks))
+        
+        # Process responses
+        filled_idx = []
+        filled_values = []
+        for i, (idx, row_dict) in enumerate(zip(chunk_idx, rows)):
+            value = values.get(i) and clean_response(column, values[i])
+            if value:
+                filled_idx.append(idx)
+                filled_values.append(value)
+                if len(examples) < 5:
+                    examples.append((row_dict.get('company_name', 'Unknown'), value))
+                if debug:
+                    logger.debug(f"  - Added {column} for {row_dict.get('company_name', 'Unknown')}: {value}")
+        
+        if filled_idx:
+            assign_values(df, column, filled_idx, filled_values)
+            filled_count += len(filled_idx)
+    
+    logger.info(f"Filled {filled_count} of {len(missing_indices)} missing {column} values, e.g. {examples}")
+
+async def save_checkpoints(df, checkpoint_file, done, interval=CHECKPOINT_INTERVAL):
+    """Save the dataset every interval seconds until done is set.
+    
+    Each checkpoint writes a copy of df in a worker thread, so the event
+    loop keeps serving the fill requests while the file is written.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame being filled.
+        checkpoint_file (str): Path of the CSV file to save progress to.
+        done (asyncio.Event): Event set once filling has finished.
+        interval (float): Seconds between checkpoints.
+    """
+    while not done.is_set():
+        try:
+            await asyncio.wait_for(done.wait(), interval)
+        except asyncio.TimeoutError:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, save_dataset, df.copy(), checkpoint_file)
+            except Exception as e:
+                logger.warning(f"Error saving checkpoint to {checkpoint_file}: {e}")
+
+async def fill_missing_values(df, client, checkpoint_file=None):
     """Fill missing values in status, homepage_url, and city columns.
     
+    The columns are independent, so they are filled concurrently. Values are
+    filled in df in place. If checkpoint_file is given, progress is saved
+    there every CHECKPOINT_INTERVAL seconds, so an interrupted run can
+    resume by loading that file and only filling the values that are still
+    missing.
+    
     Args:
         df (pandas.DataFrame): DataFrame with missing values.
-        client (OpenAI): OpenAI client.
+        client (AsyncOpenAI): Async OpenAI client.
+        checkpoint_file (str): Optional path of a CSV file to save progress to.
         
     Returns:
         pandas.DataFrame: DataFrame with filled values.
     """
-    df_filled = df.copy()
-    
     # Columns to fill
-    columns_to_fill = ['status', 'homepage_url', 'city']
+    columns_to_fill = list(PROMPT_GENERATORS)
     
     # Get missing values per column
     missing_counts = {col: df[col].isna().sum() for col in columns_to_fill}
     logger.info(f"Missing values to fill: {missing_counts}")
     
-    # Process each column
+    # Each column reads the other columns' values and writes only its own
+    # cells, so the passes cannot conflict
+    done = asyncio.Event()
+    saver = asyncio.create_task(save_checkpoints(df, checkpoint_file, done)) if checkpoint_file else None
+    try:
+        await asyncio.gather(
+            *[fill_column(df, client, column) for column in columns_to_fill]
+        )
+    finally:
+        # Let a checkpoint in progress finish before the final save
+        done.set()
+        if saver:
+            await saver
+    
+    return df
+
+def build_batch_requests(df, columns_to_fill, model=MODEL):
+    """Build one Batch API request per missing cell.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame with missing values.
+        columns_to_fill (list): Columns whose missing values should be filled.
+        model (str): String model name to use.
+        
+    Returns:
+        tuple: List of Batch API request dicts, and a dict mapping each
+        request's custom_id to its (column, index) cell.
+    """
+    requests = []
+    targets = {}
+    
     for column in columns_to_fill:
-        missing_mask = df[column].isna()
-        missing_indices = df[missing_mask].index
+        missing_indices = df.index[df[column].isna()]
+        for idx, row_dict in zip(missing_indices, df.loc[missing_indices].to_dict('records')):
+            custom_id = f"{column}:{idx}"
+            prompt = PROMPT_GENERATORS[column](row_dict)
+            requests.append({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": TEMPERATURE,
+                    "max_tokens": MAX_TOKENS,
+                    "response_format": build_response_format(column)
+                }
+            })
+            targets[custom_id] = (column, idx)
+    
+    return requests, targets
+
+def run_batch_job(client, requests, poll_interval=30):
+    """Submit requests to the OpenAI Batch API and wait for the results.
+    
+    Args:
+        client (OpenAI): OpenAI client.
+        requests (list): Batch API request dicts.
+        poll_interval (int): Seconds to wait between status checks.
         
-        if len(missing_indices) == 0:
-            logger.info(f"No missing values in column '{column}'")
+    Returns:
+        dict: Mapping of custom_id to response text for successful requests.
+    """
+    # Write the requests to a JSONL input file and upload it
+    with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+        for request in requests:
+            f.write(json.dumps(request) + '\n')
+        input_path = f.name
+    
+    try:
+        with open(input_path, 'rb') as f:
+            input_file = client.files.create(file=f, purpose="batch")
+    finally:
+        os.remove(input_path)
+    
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+    
+    # Poll until the batch finishes
+    while batch.status not in BATCH_FINAL_STATUSES:
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+        logger.info(f"Batch {batch.id} status: {batch.status}")
+    
+    if batch.status != 'completed' or not batch.output_file_id:
+        logger.error(f"Batch {batch.id} finished with status '{batch.status}'")
+        return {}
+    
+    # Parse the JSONL output file
+    responses = {}
+    output = client.files.content(batch.output_file_id)
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            logger.warning(f"Batch request {result.get('custom_id')} failed: {result.get('error')}")
             continue
+        responses[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+    
+    return responses
+
+def fill_missing_values_batch(df, client, poll_interval=30):
+    """Fill missing values in status, homepage_url, and city columns via the Batch API.
+    
+    All prompts are submitted as a single deferred batch job, which is billed
+    at a lower rate than online requests but may take up to 24 hours.
+    Values are filled in df in place.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame with missing values.
+        client (OpenAI): OpenAI client.
+        poll_interval (int): Seconds to wait between batch status checks.
         
-        logger.info(f"Processing {len(missing_indices)} missing {column} values...")
-        
-        for idx in missing_indices:
-            # Convert row to dictionary for prompt generation
-            row_dict = df.loc[idx].to_dict()
-            
-            # Generate appropriate prompt
-            if column == 'status':
-                prompt = generate_prompt_for_status(row_dict)
-            elif column == 'homepage_url':
-                prompt = generate_prompt_for_homepage_url(row_dict)
-            elif column == 'city':
-                prompt = generate_prompt_for_city(row_dict)
-            
-            # Call OpenAI API (without excessive logging)
-            response = call_openai_api(client, prompt)
-            
-            # Process response
-            if response:
-                # Simple validation
-                if column == 'status':
-                    valid_statuses = ['operating', 'closed', 'acquired', 'public']
-                    response = response.lower()
-                    if response in valid_statuses:
-                        df_filled.at[idx, column] = response
-                    else:
-                        df_filled.at[idx, column] = 'operating'
-                
-                elif column == 'homepage_url':
-                    if response.startswith(('http://', 'https://')):
-                        df_filled.at[idx, column] = response
-                    else:
-                        df_filled.at[idx, column] = 'https://' + response.lstrip('www.')
-                
-                elif column == 'city':
-                    df_filled.at[idx, column] = response
-                
-                logger.info(f"  - Added {column} for {row_dict.get('company_name', 'Unknown')}: {response}")
-    
-    return df_filled
-
-def handle_missing_values(input_file, output_file, api_key):
+    Returns:
+        pandas.DataFrame: DataFrame with filled values.
+    """
+    columns_to_fill = list(PROMPT_GENERATORS)
+    
+    requests, targets = build_batch_requests(df, columns_to_fill)
+    logger.info(f"Missing values to fill: {len(requests)}")
+    if not requests:
+        return df
+    
+    try:
+        responses = run_batch_job(client, requests, poll_interval=poll_interval)
+    except Exception as e:
+        logger.error(f"Error running OpenAI batch job: {e}")
+        return df
+    
+    # Group the results by column and write each column in one assignment
+    updates = {column: ([], []) for column in columns_to_fill}
+    for custom_id, response in responses.items():
+        column, idx = targets[custom_id]
+        value = parse_single_response(response, column)
+        value = value and clean_response(column, value)
+        if not value:
+            continue
+        updates[column][0].append(idx)
+        updates[column][1].append(value)
+    
+    for column, (indices, values) in updates.items():
+        if indices:
+            assign_values(df, column, indices, values)
+            logger.info(f"Filled {len(indices)} {column} values")
+    
+    return df
+
+def handle_missing_values(input_file, output_file, api_key, use_batch_api=False):
     """Main function to handle missing values task.
     
     Args:
         input_file (str): Path to input CSV file.
         output_file (str): Path to output CSV file.
         api_key (str): OpenAI API key.
+        use_batch_api (bool): Submit the prompts as one OpenAI Batch API job
+            instead of calling the API once per missing value.
     
     Returns:
         pandas.DataFrame or None: DataFrame with filled missing values, or None if operation failed.
@@ -212,15 +767,22 @@ def handle_missing_values(input_file, output_file, api_key):
         logger.error("Failed to load dataset.")
         return None
     
-    # Setup OpenAI client
-    client = OpenAI(api_key=api_key)
+    async def run():
+        # The shared async client is bound to the loop started by asyncio.run
+        client = get_async_client(api_key)
+        return await fill_missing_values(df, client, checkpoint_file=output_file)
     
     # Fill missing values
-    df_filled = fill_missing_values(df, client)
+    if use_batch_api:
+        df_filled = fill_missing_values_batch(df, get_client(api_key))
+    else:
+        df_filled = asyncio.run(run())
+    
+    log_cache_stats()
     
     # Save to output file
     try:
-        df_filled.to_csv(output_file, index=False)
+        save_dataset(df_filled, output_file)
         logger.info(f"Dataset with filled missing values saved to {output_file}")
     except Exception as e:
         error_msg = f"Error saving dataset to {output_file}: {e}"
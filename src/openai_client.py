@@ -0,0 +1,74 @@
+import asyncio
+import weakref
+import httpx
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+
+# Connection pool and timeouts shared by all OpenAI clients
+LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=64)
+TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Errors that are worth retrying: rate limits, timeouts, dropped connections
+# and server errors
+TRANSIENT_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Retry policy for OpenAI requests: up to 6 attempts with jittered
+# exponential backoff, re-raising the last error once attempts run out
+retry_transient = retry(
+    stop=stop_after_attempt(6),
+    wait=wait_random_exponential(multiplier=1, max=60),
+    retry=retry_if_exception_type(TRANSIENT_ERRORS),
+    reraise=True
+)
+
+_client = None
+
+# Async connections are bound to the event loop that opened them, so one
+# async client is kept per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client(api_key=None):
+    """Get the shared OpenAI client, creating it on first use.
+
+    The client uses HTTP/2 and a pooled, keep-alive connection limit so
+    that consecutive requests reuse their TLS connections.
+
+    Args:
+        api_key (str): OpenAI API key, read from OPENAI_API_KEY if None.
+
+    Returns:
+        OpenAI: Shared OpenAI client.
+    """
+    global _client
+    if _client is None:
+        _client = OpenAI(
+            api_key=api_key,
+            timeout=TIMEOUT,
+            http_client=httpx.Client(http2=True, limits=LIMITS, timeout=TIMEOUT)
+        )
+    return _client
+
+
+def get_async_client(api_key=None):
+    """Get the shared async OpenAI client of the running event loop.
+
+    Must be called from a coroutine. Each event loop gets its own client,
+    created on first use, with HTTP/2 and pooled keep-alive connections.
+
+    Args:
+        api_key (str): OpenAI API key, read from OPENAI_API_KEY if None.
+
+    Returns:
+        AsyncOpenAI: Shared async OpenAI client.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=TIMEOUT,
+            http_client=httpx.AsyncClient(http2=True, limits=LIMITS, timeout=TIMEOUT)
+        )
+        _async_clients[loop] = client
+    return client
\ No newline at end of file
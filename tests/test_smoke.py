@@ -0,0 +1,57 @@
+import os
+import sys
+
+# Make the pipeline modules in src/ importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from data_cleaning import clean_dataset, clean_dataset_in_chunks
+
+INPUT_FILE = os.path.join(ROOT_DIR, "data", "entrio_gen_ai_assignment_Q1_2025.csv")
+
+HEADER = (
+    "company_name,status,permalink,homepage_url,market,country_code,state_code,"
+    "region,city,company_founding_date,founded_year,founded_month,founded_quarter,"
+    "funding_rounds,funding_total_usd,first_funding_round_at,last_funding_round_at"
+)
+
+
+def test_clean_dataset_on_bundled_csv(tmp_path):
+    """Clean the bundled input file end to end."""
+    output_file = tmp_path / "assignment_output.csv"
+    
+    df = clean_dataset(INPUT_FILE, str(output_file))
+    
+    assert df is not None
+    assert len(df) == 448
+    assert output_file.exists()
+    
+    lines = output_file.read_text().splitlines()
+    assert lines[0] == HEADER
+    # Dates keep their time part and whole floats keep their trailing .0
+    assert lines[1] == (
+        "Experifun,operating,/organization/experifun,http://experifun.com,"
+        "Education,IND,,Bangalore,Bangalore,2012-01-01 00:00:00,2012.0,"
+        "2012-01-01 00:00:00,2012-Q1,2.0,335000.0,2013-11-27 00:00:00,"
+        "2014-09-19 00:00:00"
+    )
+    assert lines[3] == (
+        "Quisk,operating,/organization/quisk,http://quisk.co,Finance,USA,CA,"
+        "SF Bay Area,Sunnyvale,,,,,1.0,6250000.0,2014-09-02 00:00:00,"
+        "2014-09-02 00:00:00"
+    )
+
+
+def test_chunked_and_parallel_cleaning_match(tmp_path):
+    """Chunked and multi-process cleaning write the same file as a plain run."""
+    expected_file = tmp_path / "expected.csv"
+    chunked_file = tmp_path / "chunked.csv"
+    parallel_file = tmp_path / "parallel.csv"
+    
+    clean_dataset(INPUT_FILE, str(expected_file))
+    clean_dataset_in_chunks(INPUT_FILE, str(chunked_file), chunksize=100)
+    clean_dataset(INPUT_FILE, str(parallel_file), workers=2)
+    
+    expected = expected_file.read_bytes()
+    assert chunked_file.read_bytes() == expected
+    assert parallel_file.read_bytes() == expected
\ No newline at end of file
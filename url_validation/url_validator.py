@@ -1,10 +1,19 @@
 import os
+import sys
+import socket
+import asyncio
+import itertools
+import httpx
 import pandas as pd
 import logging
-import concurrent.futures
-from openai import OpenAI
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+# Make the shared modules in src/ importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from llm_cache import cached, hash_key, log_cache_stats
+from openai_client import get_async_client, retry_transient
+
 # Configure logging to only show our logs
 logging.basicConfig(
     level=logging.INFO,
@@ -18,39 +27,247 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 logging.getLogger("requests").setLevel(logging.WARNING)
 
-def validate_url(args):
-    """Validate if a URL is valid and active using OpenAI.
+# Maximum number of URL validations in flight at once
+MAX_CONCURRENCY = 64
+
+# Number of completed validations between checkpoints
+CHECKPOINT_EVERY = 100
+
+# Model used for URL validation
+MODEL = "gpt-4o-mini"
+
+# Timeout, in seconds, and connection limit of the HTTP probe
+PROBE_TIMEOUT = 5
+PROBE_MAX_CONNECTIONS = 200
+
+# Host resolved once to confirm that the DNS resolver is reachable
+RESOLVER_CHECK_HOST = "example.com"
+
+# getaddrinfo errors meaning the host has no DNS records
+NOT_FOUND_ERRORS = tuple(
+    getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA') if hasattr(socket, name)
+)
+
+_probe_client = None
+_resolver_check = None
+
+def get_probe_client():
+    """Get the shared async HTTP client for URL probes, creating it on first use.
+    
+    Returns:
+        httpx.AsyncClient: Shared HTTP client
+    """
+    global _probe_client
+    if _probe_client is None:
+        _probe_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=PROBE_MAX_CONNECTIONS))
+    return _probe_client
+
+async def close_probe_client():
+    """Close the shared HTTP client and forget the resolver check.
+    
+    Both are bound to the running event loop, so they are recreated on
+    first use when main runs again in a new loop.
+    """
+    global _probe_client, _resolver_check
+    if _probe_client is not None:
+        await _probe_client.aclose()
+    _probe_client = None
+    _resolver_check = None
+
+def validation_cache_key(prompt):
+    """Build the response cache key for an ask_openai call.
     
     Args:
-        args: Tuple containing (client, idx, url)
+        prompt: Prompt to send
         
     Returns:
-        Tuple: (idx, result)
+        str: Cache key
     """
-    client, idx, url = args
+    return hash_key(prompt, f"{MODEL}:web_search_preview", temperature=None)
+
+@cached(key_fn=validation_cache_key)
+@retry_transient
+async def ask_openai(prompt):
+    """Send a prompt with web search enabled, retrying transient errors with backoff.
     
-    # Skip empty URLs
-    if pd.isna(url) or not url:
+    Args:
+        prompt: Prompt to send
+        
+    Returns:
+        str: Response text
+    """
+    response = await get_async_client().responses.create(
+        model=MODEL,
+        tools=[{"type": "web_search_preview", "search_context_size": "low"}],
+        input=prompt
+    )
+    return response.output_text.strip()
+
+def syntactic_ok(url):
+    """Check if a URL is a well-formed http(s) URL with a plausible domain.
+    
+    Args:
+        url: URL to check
+        
+    Returns:
+        bool: True if the URL is well-formed, False otherwise
+    """
+    try:
+        parsed = urlparse(url)
+        host = parsed.hostname
+    except ValueError:
+        return False
+    
+    if parsed.scheme not in ('http', 'https') or not host:
+        return False
+    
+    # Require a registrable domain: at least two non-empty labels
+    labels = host.split('.')
+    return len(labels) >= 2 and all(labels)
+
+async def resolver_works():
+    """Check whether the DNS resolver is reachable, resolving a known host once.
+    
+    When the resolver cannot be reached, getaddrinfo reports EAI_NONAME for
+    every host, so a missing host only proves the domain does not exist
+    once the resolver is known to work.
+    
+    Returns:
+        bool: True if RESOLVER_CHECK_HOST resolves, False otherwise
+    """
+    global _resolver_check
+    if _resolver_check is None:
+        _resolver_check = asyncio.ensure_future(
+            asyncio.get_running_loop().getaddrinfo(RESOLVER_CHECK_HOST, None)
+        )
+    try:
+        await asyncio.shield(_resolver_check)
+        return True
+    except Exception:
+        return False
+
+async def resolves(url):
+    """Check if the host of a URL resolves in DNS.
+    
+    Temporary resolver failures are treated as resolving, so that the URL
+    is still checked by the later tiers rather than rejected. A missing host
+    is only reported when the resolver itself is reachable.
+    
+    Args:
+        url: URL whose host to resolve
+        
+    Returns:
+        bool or None: False if the host does not exist, None if the resolver
+        could not tell, True otherwise
+    """
+    try:
+        await asyncio.get_running_loop().getaddrinfo(urlparse(url).hostname, None)
+        return True
+    except socket.gaierror as e:
+        if e.errno == socket.EAI_AGAIN:
+            return True
+        if e.errno in NOT_FOUND_ERRORS and await resolver_works():
+            return False
+        return None
+    except Exception:
+        return True
+
+async def cheap_probe(url):
+    """Check if a URL responds successfully to an HTTP HEAD request.
+    
+    Args:
+        url: URL to probe
+        
+    Returns:
+        str: "Yes" if the URL responds with a non-error status, None otherwise
+    """
+    try:
+        response = await get_probe_client().head(url, timeout=PROBE_TIMEOUT, follow_redirects=True)
+        return "Yes" if response.status_code < 400 else None
+    except Exception:
+        return None
+
+async def validate_url(idx, url):
+    """Validate if a URL is valid and active.
+    
+    Checks run from cheapest to most expensive: malformed URLs and URLs
+    whose domain does not resolve are rejected locally, URLs answering an
+    HTTP HEAD probe are accepted, and OpenAI is only asked about the rest,
+    e.g. on connection errors or error status codes.
+    
+    Args:
+        idx: Row index of the URL
+        url: Non-empty URL to validate
+        
+    Returns:
+        Tuple: (idx, result), where result is None if the DNS lookup or
+        the OpenAI check failed, so the URL is validated again on the next run
+    """
+    if not syntactic_ok(url):
+        return (idx, "No")
+    
+    resolved = await resolves(url)
+    if resolved is None:
+        return (idx, None)
+    if not resolved:
         return (idx, "No")
     
+    if await cheap_probe(url) == "Yes":
+        return (idx, "Yes")
+    
     try:        
         prompt = f"Is this URL valid and active: {url}? Answer ONLY with Yes or No, NOTHING ELSE."
         
-        response = client.responses.create(
-            model="gpt-4o-mini",
-            tools=[{"type": "web_search_preview", "search_context_size": "low"}],
-            input=prompt
-        )
-        
-        result = response.output_text.strip()
+        result = await ask_openai(prompt)
         
         return (idx, "Yes" if "YES" in result.upper() else "No")
         
     except Exception as e:
         logger.error(f"Error with {url}: {e}")
-        return (idx, "No")
+        return (idx, None)
+
+async def stream_validations(tasks, window=MAX_CONCURRENCY):
+    """Validate URLs with a bounded number in flight, yielding results as they complete.
+    
+    New validations are only started as earlier ones finish, so at most
+    window validations are pending at once, however many URLs there are.
+    
+    Args:
+        tasks: Iterable of (idx, url) tuples
+        window: Maximum number of validations in flight
+        
+    Yields:
+        Tuple: (idx, result)
+    """
+    tasks = iter(tasks)
+    pending = set()
+    while True:
+        # Top up the window from the remaining tasks
+        for idx, url in itertools.islice(tasks, window - len(pending)):
+            pending.add(asyncio.create_task(validate_url(idx, url)))
+        
+        if not pending:
+            return
+        
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is not None:
+                logger.error(f"Unexpected error validating URL: {task.exception()}")
+                continue
+            yield task.result()
 
-def main():
+def save_checkpoint(df, csv_file):
+    """Save the dataset atomically, via a temporary file.
+    
+    Args:
+        df: DataFrame to save
+        csv_file: Path to the CSV file
+    """
+    tmp_file = f"{csv_file}.tmp"
+    df.to_csv(tmp_file, index=False)
+    os.replace(tmp_file, csv_file)
+
+async def main():
     """Validate URLs in the dataset and add validation results."""
     # Load API key
     load_dotenv()
@@ -60,8 +277,8 @@ def main():
         logger.error("OpenAI API key not found")
         return
     
-    # Initialize OpenAI client once
-    client = OpenAI(api_key=api_key)
+    # Create the shared async OpenAI client used by the validations
+    get_async_client(api_key)
     
     # Define file path
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -79,32 +296,51 @@ def main():
     if 'valid_url' not in df.columns:
         df['valid_url'] = None
     
-    # Create a list of tasks for URLs that need processing
-    tasks = []
-    for idx, row in df.iterrows():
-        # Skip already processed URLs
-        if pd.notna(df.at[idx, 'valid_url']):
-            continue
-        
-        url = row['homepage_url']
-        tasks.append((client, idx, url))
+    # Skip already processed URLs, and mark empty URLs invalid without a task
+    mask = df['valid_url'].isna()
+    urls = df['homepage_url']
+    empty = mask & (urls.isna() | urls.astype(str).str.strip().eq(''))
+    df.loc[empty, 'valid_url'] = "No"
+    mask &= ~empty
     
-    # Set up parallel processing
-    max_workers = 5  # Adjust based on rate limits
+    # Create a list of tasks for URLs that need processing
+    tasks = list(zip(df.index[mask], urls[mask].to_numpy()))
     
     if not tasks:
         logger.info("No URLs to process")
+        save_checkpoint(df, csv_file)
         return
     
-    # Process URLs in parallel
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks and process results as they complete
-        for idx, result in executor.map(validate_url, tasks):
-            df.at[idx, 'valid_url'] = result
+    # Process URLs concurrently, recording results as they complete and
+    # checkpointing regularly so that a rerun resumes from the last checkpoint
+    completed = 0
+    failed = 0
+    try:
+        async for idx, value in stream_validations(tasks):
+            completed += 1
+            
+            # Leave failed validations empty so that a rerun retries them
+            if value is None:
+                failed += 1
+            else:
+                df.at[idx, 'valid_url'] = value
+            
+            # Write the checkpoint from a thread so that the validations in
+            # flight keep running, writing a copy since df keeps changing meanwhile
+            if completed % CHECKPOINT_EVERY == 0:
+                await asyncio.get_running_loop().run_in_executor(None, save_checkpoint, df.copy(), csv_file)
+                logger.info(f"Checkpoint saved after {completed} of {len(tasks)} URLs")
+    finally:
+        await close_probe_client()
+    
+    if failed:
+        logger.warning(f"{failed} URLs could not be validated and will be retried on the next run")
+    
+    log_cache_stats()
     
     # Save results
-    df.to_csv(csv_file, index=False)
+    save_checkpoint(df, csv_file)
     logger.info(f"Finished - results saved")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
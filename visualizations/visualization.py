@@ -1,11 +1,18 @@
 import os
 import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Render to files only, without loading a GUI toolkit
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.gridspec import GridSpec
 
+# Columns read by the dashboard panels, and those stored as categoricals
+DASHBOARD_COLUMNS = ['city', 'country_code', 'funding_total_usd', 'status', 'market']
+CATEGORICAL_COLUMNS = ['city', 'country_code', 'status', 'market']
+
 
 def main():
     """Execute the visualization pipeline for city frequency analysis.
@@ -48,8 +55,10 @@ def main():
     dashboard_path = output_dir / "city_dashboard.png"
     
     # Load and process the data
-    df = pd.read_csv(csv_file)
+    df = pd.read_csv(csv_file, engine='pyarrow', usecols=DASHBOARD_COLUMNS)
     df['city'] = df['city'].fillna('Unknown')
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = to_categorical(df[column])
     
     # Create the dashboard
     create_focused_dashboard(df, dashboard_path)
@@ -67,6 +76,13 @@ def create_focused_dashboard(df, output_path):
     Returns:
         None
     """
+    # Simplify paths while rendering
+    plt.rcParams.update({
+        'path.simplify': True,
+        'path.simplify_threshold': 1.0,
+        'agg.path.chunksize': 10000
+    })
+    
     # Set up the figure with appropriate sizing
     plt.figure(figsize=(12, 10), dpi=100)
     gs = GridSpec(2, 2, figure=plt.gcf(), height_ratios=[1, 1.2])
@@ -74,38 +90,47 @@ def create_focused_dashboard(df, output_path):
     # Add dashboard title
     plt.suptitle('Company Distribution by City', fontsize=16, fontweight='bold', y=0.98)
     
+    # Count companies once and share the counts between panels. Pairs are
+    # counted in first-seen order so that ties rank by first appearance
+    top_cities = count_values(df['city']).head(15)
+    country_city_counts = (
+        df[['country_code', 'city']]
+        .groupby(['country_code', 'city'], sort=False, observed=True)
+        .size()
+        .rename('Count')
+        .reset_index()
+    )
+    
     # Create individual panels
     ax1 = plt.subplot(gs[0, 0])
-    create_top_cities_chart(df, ax1)
+    create_top_cities_chart(df, ax1, top_cities)
     
     ax2 = plt.subplot(gs[0, 1])
-    create_countries_cities_chart(df, ax2)
+    create_countries_cities_chart(df, ax2, country_city_counts)
     
     ax3 = plt.subplot(gs[1, :])
-    create_city_table(df, ax3)
+    create_city_table(df, ax3, top_cities)
     
     # Finalize layout and save
     plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.savefig(output_path, bbox_inches='tight')
-    plt.close()
+    plt.savefig(output_path, bbox_inches='tight', dpi=100)
+    plt.close('all')
 
 
-def create_top_cities_chart(df, ax):
+def create_top_cities_chart(df, ax, top_cities):
     """Create a horizontal bar chart of top 15 cities by company count.
     
     Args:
         df: DataFrame containing the company data.
         ax: Matplotlib axis to plot on.
+        top_cities: Company counts of the top 15 cities.
         
     Returns:
         None
     """
-    # Get top 15 cities
-    city_counts = df['city'].value_counts().head(15)
-    
     # Create horizontal bar chart with color gradient
-    colors = sns.color_palette("Blues_d", len(city_counts))
-    bars = ax.barh(y=city_counts.index[::-1], width=city_counts.values[::-1], 
+    colors = sns.color_palette("Blues_d", len(top_cities))
+    bars = ax.barh(y=top_cities.index[::-1], width=top_cities.values[::-1], 
                   color=colors[::-1], height=0.7)
     
     # Add count labels inside the bars for better readability
@@ -125,7 +150,7 @@ def create_top_cities_chart(df, ax):
     ax.grid(axis='x', linestyle='--', alpha=0.6)
 
 
-def create_countries_cities_chart(df, ax):
+def create_countries_cities_chart(df, ax, country_city_counts):
     """Create a nested bar chart showing top cities within top countries.
     
     Shows the top 3 cities in each of the top 5 countries by company count.
@@ -133,29 +158,24 @@ def create_countries_cities_chart(df, ax):
     Args:
         df: DataFrame containing the company data.
         ax: Matplotlib axis to plot on.
+        country_city_counts: DataFrame of company counts per country_code and city.
         
     Returns:
         None
     """
     # Get top 5 countries
-    top_countries = df['country_code'].value_counts().head(5).index
-    
-    # Prepare data for plotting
-    plot_data = []
-    
-    for country in top_countries:
-        country_df = df[df['country_code'] == country]
-        top_cities = country_df['city'].value_counts().head(3)
-        
-        for city, count in top_cities.items():
-            plot_data.append({
-                'Country': country,
-                'City': city,
-                'Count': count
-            })
-    
-    # Convert to DataFrame for plotting
-    plot_df = pd.DataFrame(plot_data)
+    top_countries = count_values(df['country_code']).head(5).index
+    
+    # Keep the top 3 cities of each of those countries, as plain strings
+    # so that the countries are plotted in alphabetical order
+    plot_df = (
+        country_city_counts[country_city_counts['country_code'].isin(top_countries)]
+        .sort_values('Count', ascending=False, kind='stable')
+        .groupby('country_code', observed=True)
+        .head(3)
+        .astype({'country_code': str, 'city': str})
+        .rename(columns={'country_code': 'Country', 'city': 'City'})
+    )
     
     # Create color palette for countries
     colors = sns.color_palette("Blues", len(top_countries))
@@ -206,7 +226,54 @@ def create_countries_cities_chart(df, ax):
     ax.set_xlim(0, None)  # Ensure x-axis starts at 0
 
 
-def create_city_table(df, ax):
+def to_categorical(values):
+    """Convert a column to a categorical with categories in first-seen order.
+    
+    Categorical value_counts breaks ties by category order, so first-seen
+    categories rank tied values by first appearance, as for plain objects.
+    
+    Args:
+        values: Series of values.
+        
+    Returns:
+        pandas.Series: Categorical Series.
+    """
+    return values.astype(pd.CategoricalDtype(pd.unique(values.dropna())))
+
+
+def count_values(values):
+    """Count the occurrences of each value, most frequent first.
+    
+    Args:
+        values: Series of values.
+        
+    Returns:
+        pandas.Series: Count of each value, sorted in descending order,
+        without the categories that do not occur in values.
+    """
+    counts = values.value_counts()
+    return counts[counts > 0]
+
+
+def most_common(values):
+    """Find the most frequent value in a column.
+    
+    Ties go to the value that appears first in values, rather than to the
+    first category of the whole column.
+    
+    Args:
+        values: Series of values.
+        
+    Returns:
+        The most frequent value, or 'Unknown' if the Series has no values.
+    """
+    seen = values.dropna().unique()
+    if len(seen) == 0:
+        return 'Unknown'
+    return values.value_counts().reindex(seen).idxmax()
+
+
+def create_city_table(df, ax, top_cities):
     """Create a detailed statistics table for the top 15 cities.
     
     Shows city, country, company count, average funding, most common status,
@@ -215,37 +282,36 @@ def create_city_table(df, ax):
     Args:
         df: DataFrame containing the company data.
         ax: Matplotlib axis to place the table.
+        top_cities: Company counts of the top 15 cities.
         
     Returns:
         None
     """
-    # Calculate city statistics
-    city_stats = []
-    top_cities = df['city'].value_counts().head(15)
+    # Calculate all city statistics in a single grouped pass
+    stats = (
+        df[df['city'].isin(top_cities.index)]
+        .groupby('city', sort=False, observed=True)
+        .agg(
+            country=('country_code', 'first'),
+            avg_funding=('funding_total_usd', 'mean'),
+            status=('status', most_common),
+            market=('market', most_common)
+        )
+        .reindex(top_cities.index)
+    )
     
-    for city, count in top_cities.items():
-        city_df = df[df['city'] == city]
-        
-        # Extract key statistics
-        country = city_df['country_code'].iloc[0] if not city_df.empty else 'Unknown'
-        avg_funding = city_df['funding_total_usd'].mean() if not city_df.empty else 0
-        
-        # Format funding amount for readability
-        funding_display = f"${avg_funding/1000000:.1f}M" if avg_funding >= 1000000 else f"${avg_funding/1000:.1f}K"
-        
-        # Find most common values
-        most_common_status = city_df['status'].value_counts().index[0] if not city_df.empty else 'Unknown'
-        markets = city_df['market'].value_counts()
-        most_common_market = markets.index[0] if not markets.empty else 'Unknown'
-        
-        city_stats.append([
-            city, 
-            country, 
-            count, 
-            funding_display,
-            most_common_status,
-            most_common_market
-        ])
+    # Format funding amounts for readability
+    avg_funding = stats['avg_funding']
+    stats['funding_display'] = np.where(
+        avg_funding >= 1000000,
+        (avg_funding / 1000000).map('${:.1f}M'.format),
+        (avg_funding / 1000).map('${:.1f}K'.format)
+    )
+    
+    city_stats = [
+        [city, row.country, count, row.funding_display, row.status, row.market]
+        for (city, count), row in zip(top_cities.items(), stats.itertuples())
+    ]
     
     # Create the table
     table = ax.table(